@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf8 -*-
+"""
+Compare recursive and iterative serializer on deeply nested and wide
+structures. Both implementations must produce identical output.
+
+Usage: python benchmarks/serializer.py [REPEAT]
+"""
+
+import os.path
+import sys
+import timeit
+import uuid
+
+# run from source tree without installing the package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+from log2sentry.raven.serializer import manager, iterative
+
+
+class Sentry(object):
+    def __sentry__(self):
+        return {'sentry': [1, 2, 3]}
+
+
+class Opaque(object):
+    def __repr__(self):
+        return '<Opaque>'
+
+
+def deep(depth):
+    value = [u'leaf', 'leaf', 1, 1.5, 2L, True, None]
+    for i in xrange(depth):
+        value = {'level%d' % i: value, 'sibling': (i, str(i))}
+    return value
+
+
+def wide(width):
+    cyclic = [1, 2]
+    cyclic.append(cyclic)
+    return dict(('key%d' % i, [i, u'ž' * 10, 'x' * 500, uuid.UUID(int=i),
+                              Sentry(), Opaque(), cyclic, set([i])])
+                for i in xrange(width))
+
+
+CASES = [
+    ('deep', deep(200), {}),
+    ('deep, max_depth=100', deep(200), {'max_depth': 100}),
+    ('wide', wide(1000), {}),
+    ('wide, limited', wide(1000),
+        {'list_max_length': 50, 'string_max_length': 400}),
+]
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    for name, value, kwargs in CASES:
+        expected = manager.transform(value, **kwargs)
+        actual = iterative.transform(value, **kwargs)
+        assert expected == actual, name
+
+        results = []
+        for transform in (manager.transform, iterative.transform):
+            timer = timeit.Timer(lambda: transform(value, **kwargs))
+            results.append(min(timer.repeat(3, repeat)) / repeat)
+
+        print '{0:<24} recursive {1:8.3f} ms   iterative {2:8.3f} ms'.format(
+            name, results[0] * 1000, results[1] * 1000)
+
+    # recursive implementation fails on this depth
+    value = deep(sys.getrecursionlimit() * 2)
+    iterative.transform(value, max_depth=sys.getrecursionlimit() * 3)
+    print 'depth {0}: ok'.format(sys.getrecursionlimit() * 2)
+
+
+if __name__ == '__main__':
+    main()
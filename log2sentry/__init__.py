@@ -8,10 +8,12 @@ raven-python (https://github.com/getsentry/raven-python) projects.
 """
 
 from .log2json import Log2Json
+from .payload import PayloadFileHandler
+from .varfilter import VarFilter
 
 try:
     VERSION = __import__('pkg_resources').get_distribution('log2sentry').version
 except Exception as e:
     VERSION = 'unknown'
 
-__all__ = ('VERSION', 'Log2Json')
+__all__ = ('VERSION', 'Log2Json', 'PayloadFileHandler', 'VarFilter')
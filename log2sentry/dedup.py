@@ -0,0 +1,105 @@
+# -*- coding: utf8 -*-
+"""
+Provides content-addressed storage of events used by log2sentry-prepare to
+deduplicate repeated events. Events which differ only in volatile fields
+(event_id, timestamp) share one body stored as payload in objects directory
+under SHA-1 of the body. Object files have .obj extension, so they can't be
+mistaken for complete payloads ready to send. Each event is then represented
+by small reference file with its volatile fields:
+
+    {"object": "objects/<sha1>.obj", "event_id": ..., "timestamp": ...}
+"""
+
+import hashlib
+import json
+import os.path
+
+from .payload import encode_payload, decode_payload
+
+__all__ = ('VOLATILE_FIELDS', 'split_event', 'get_body_key', 'ObjectStore',
+           'is_ref', 'read_event')
+
+
+VOLATILE_FIELDS = ('event_id', 'timestamp')
+
+OBJECTS_DIR = 'objects'
+
+OBJECT_EXT = '.obj'
+
+REF_EXT = '.ref'
+
+
+def split_event(event):
+    """Splits event dictionary to (body, volatile) dictionaries."""
+    body = dict(event)
+    volatile = {}
+    for field in VOLATILE_FIELDS:
+        if field in body:
+            volatile[field] = body.pop(field)
+    return body, volatile
+
+
+def get_body_key(body):
+    """Returns content address of event body."""
+    return hashlib.sha1(_dump_body(body)).hexdigest()
+
+
+def _dump_body(body):
+    return json.dumps(body, sort_keys=True, separators=(',', ':'))
+
+
+class ObjectStore(object):
+    """Store of event bodies in directory. Body is written only once,
+    repeated events get reference only."""
+
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+        self.objects_path = os.path.join(dir_path, OBJECTS_DIR)
+        self._written = set()
+
+    def add(self, key, body):
+        """Writes body if it is not stored yet and returns its path
+        relative to the store directory."""
+        relative_path = os.path.join(OBJECTS_DIR, key + OBJECT_EXT)
+
+        if key not in self._written:
+            if not os.path.isdir(self.objects_path):
+                os.mkdir(self.objects_path)
+
+            with open(os.path.join(self.dir_path, relative_path), 'w') as fd:
+                fd.write(encode_payload(_dump_body(body)))
+            self._written.add(key)
+
+        return relative_path
+
+    def write_ref(self, path, key, body, volatile):
+        """Stores body and writes reference file to path."""
+        ref = dict(volatile)
+        ref['object'] = self.add(key, body)
+
+        with open(path, 'w') as fd:
+            fd.write(json.dumps(ref, separators=(',', ':')))
+
+
+def is_ref(path):
+    return path.endswith(REF_EXT)
+
+
+def read_event(path):
+    """Returns JSON string of event from payload or reference file."""
+    with open(path) as fd:
+        data = fd.read()
+
+    if not is_ref(path):
+        return decode_payload(data)
+
+    ref = json.loads(data)
+    if not isinstance(ref, dict) or \
+            not isinstance(ref.get('object'), basestring):
+        raise ValueError('invalid reference file')
+    object_path = os.path.join(os.path.dirname(path), ref.pop('object'))
+    with open(object_path) as fd:
+        event = json.loads(decode_payload(fd.read()))
+
+    event.update(ref)
+    return json.dumps(event)
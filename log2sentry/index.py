@@ -0,0 +1,225 @@
+# -*- coding: utf8 -*-
+"""
+Provides reading and writing of index files created by log2sentry-prepare.
+Index describes prepared events, so they can be selected without decoding
+of payloads. Each line of index is JSON array:
+
+    [event_id, level, logger, timestamp, culprit, file]
+
+where file is name of payload file relative to the index directory.
+"""
+
+import collections
+import fnmatch
+import json
+import logging
+import os.path
+import re
+import sys
+from datetime import datetime
+
+__all__ = ('IndexEntry', 'IndexWriter', 'read_index', 'find_indexes',
+           'parse_level', 'parse_timestamp', 'Query')
+
+
+INDEX_EXT = '.idx'
+
+IndexEntry = collections.namedtuple('IndexEntry',
+                ('event_id', 'level', 'logger', 'timestamp', 'culprit',
+                 'file'))
+
+
+class IndexWriter(object):
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = open(path, 'w')
+
+    def add(self, event, file_path):
+        """Adds entry for event, which is dictionary or JSON string. Returns
+        False if the event can't be parsed."""
+        if isinstance(event, basestring):
+            try:
+                event = json.loads(event)
+            except ValueError:
+                return False
+        if not isinstance(event, dict):
+            return False
+
+        entry = [event.get('event_id'), event.get('level'),
+                 event.get('logger'), event.get('timestamp'),
+                 event.get('culprit'), os.path.basename(file_path)]
+        self.fd.write(json.dumps(entry, separators=(',', ':')))
+        self.fd.write('\n')
+        return True
+
+    def close(self):
+        self.fd.close()
+
+
+def read_index(path, on_error=None):
+    """Yields IndexEntry for every line of index; file is joined with
+    directory of the index. Malformed lines are skipped and reported by
+    calling on_error(message), default is to write warning to stderr."""
+    if on_error is None:
+        on_error = _warn
+
+    dir_path = os.path.dirname(os.path.abspath(path))
+    with open(path) as fd:
+        for lineno, line in enumerate(fd, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                entry = _parse_entry(line)
+            except ValueError as e:
+                on_error('{0}:{1}: skipping malformed index line: {2}'.format(
+                    path, lineno, e))
+                continue
+
+            yield entry._replace(file=os.path.join(dir_path, entry.file))
+
+
+def _parse_entry(line):
+    """Returns IndexEntry with fields coerced to expected types. Raises
+    ValueError if line can't be used at all."""
+    fields = json.loads(line)
+    if not isinstance(fields, list) or len(fields) != len(IndexEntry._fields):
+        raise ValueError('expected array of {0} items'.format(
+            len(IndexEntry._fields)))
+
+    event_id, level, logger, timestamp, culprit, file_name = fields
+    if not isinstance(file_name, basestring) or not file_name:
+        raise ValueError('missing file name')
+
+    return IndexEntry(_to_string(event_id), _to_level(level),
+                      _to_string(logger), _to_string(timestamp),
+                      _to_string(culprit), file_name)
+
+
+def _to_string(value):
+    if value is None or isinstance(value, basestring):
+        return value
+    if isinstance(value, (int, long, float)) and not isinstance(value, bool):
+        return unicode(value)
+    return None
+
+
+def _to_level(value):
+    if isinstance(value, (int, long)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, basestring):
+        try:
+            return parse_level(value)
+        except ValueError:
+            pass
+    return None
+
+
+def _warn(message):
+    print >>sys.stderr, message
+
+
+def find_indexes(path):
+    """Returns index files under path, which is index file or directory
+    searched recursively."""
+    if os.path.isfile(path):
+        return [path]
+
+    found = []
+    for dir_path, dir_names, file_names in os.walk(path):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.endswith(INDEX_EXT):
+                found.append(os.path.join(dir_path, file_name))
+    return found
+
+
+def parse_level(level):
+    """Converts level name or number to number."""
+    try:
+        return int(level)
+    except ValueError:
+        pass
+
+    number = logging.getLevelName(level.upper())
+    if not isinstance(number, int):
+        raise ValueError('unknown level: ' + level)
+    return number
+
+
+TIMESTAMP_FORMATS = ('%Y-%m-%d', '%Y-%m-%d{0}%H:%M', '%Y-%m-%d{0}%H:%M:%S',
+                     '%Y-%m-%d{0}%H:%M:%S.%f')
+
+
+def parse_timestamp(timestamp):
+    """Converts date or date and time with 'T' or space separator to ISO
+    format used in events (datetime.isoformat())."""
+    timestamp = timestamp.strip()
+    for pattern in TIMESTAMP_FORMATS:
+        for separator in ('T', ' '):
+            try:
+                parsed = datetime.strptime(timestamp,
+                                           pattern.format(separator))
+            except ValueError:
+                continue
+            return parsed.isoformat()
+
+    raise ValueError('invalid timestamp: ' + timestamp)
+
+
+def _normalize_timestamp(timestamp):
+    # some producers use space instead of 'T' as date and time separator
+    if len(timestamp) > 10 and timestamp[10] == ' ':
+        timestamp = timestamp[:10] + 'T' + timestamp[11:]
+    return timestamp
+
+
+class Query(object):
+    """Predicate over index entries. All given conditions must match.
+
+    min_level: minimal level (number),
+    logger, culprit: globs,
+    event_id: exact event id,
+    since, until: timestamps in ISO format as returned by parse_timestamp,
+                  since inclusive and until exclusive"""
+
+    def __init__(self, min_level=None, logger=None, culprit=None,
+                 event_id=None, since=None, until=None):
+        self.min_level = min_level
+        self.logger_re = _compile_glob(logger)
+        self.culprit_re = _compile_glob(culprit)
+        self.event_id = event_id
+        self.since = since
+        self.until = until
+
+    def __call__(self, entry):
+        if self.event_id is not None and entry.event_id != self.event_id:
+            return False
+        if self.min_level is not None and \
+                (entry.level is None or entry.level < self.min_level):
+            return False
+        # timestamps are in ISO format, they can be compared as strings
+        if self.since is not None or self.until is not None:
+            if entry.timestamp is None:
+                return False
+            timestamp = _normalize_timestamp(entry.timestamp)
+            if self.since is not None and timestamp < self.since:
+                return False
+            if self.until is not None and timestamp >= self.until:
+                return False
+        if self.logger_re and not _match(self.logger_re, entry.logger):
+            return False
+        if self.culprit_re and not _match(self.culprit_re, entry.culprit):
+            return False
+        return True
+
+
+def _compile_glob(pattern):
+    if pattern is None:
+        return None
+    return re.compile(fnmatch.translate(pattern))
+
+
+def _match(regex, value):
+    return isinstance(value, basestring) and regex.match(value) is not None
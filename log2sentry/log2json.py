@@ -7,7 +7,6 @@ This code is copied from snitch (https://github.com/ronaldevers/snitch).
 """
 
 import datetime
-import inspect
 import logging
 import uuid
 
@@ -21,7 +20,9 @@ except ImportError:
     _encodeError = TypeError
 
 from .raven import (MAX_LENGTH_LIST, MAX_LENGTH_STRING,
-                   varmap, shorten, get_stack_info, iter_stack_frames)
+                   varmap, shorten, get_stack_info, _getitem_from_frame)
+
+from .varfilter import VarFilter
 
 from socket import getfqdn
 
@@ -52,6 +53,16 @@ def _convert_to_json(sentry_data):
         return '{}'
 
 
+def _get_omitted_frame(count):
+    """Returns frame placed to the stack trace instead of omitted frames."""
+    return {'abs_path': None,
+            'filename': '...',
+            'module': None,
+            'function': '<{0} frames omitted>'.format(count),
+            'lineno': 0,
+            'vars': {}}
+
+
 class Log2Json(logging.Formatter):
     """Formatter for python standard logging. The format is the JSON
     format of Sentry (github/getsentry/sentry). Some functionality of
@@ -67,18 +78,46 @@ class Log2Json(logging.Formatter):
 
     def __init__(self, project=None, fqdn=None,
                  string_max_length=MAX_LENGTH_STRING,
-                 list_max_length=MAX_LENGTH_LIST):
+                 list_max_length=MAX_LENGTH_LIST,
+                 inner_frames_max_length=None,
+                 outer_frames_max_length=None,
+                 exclude_var_names=None,
+                 exclude_var_types=None,
+                 exclude_var_modules=None):
         """
         project: the sentry project, if you don't specify this, you
                  will have to add it later on
         fqdn: if you want, you can override the fqdn,
         string_max_length: max length of stack frame string representations,
-        list_max_length: max frames that will be rendered in a stack trace"""
+        list_max_length: max frames that will be rendered in a stack trace,
+        inner_frames_max_length, outer_frames_max_length: if any of them is
+                 set, only given number of innermost and outermost frames
+                 of a traceback is rendered, frames between them are
+                 replaced by single frame with count of omitted frames,
+        exclude_var_names, exclude_var_types, exclude_var_modules: locals
+                 matching any of name globs, types (classes or dotted
+                 names) or module globs are replaced by placeholder
+                 before serialization, see VarFilter"""
         self.project = project
         self.fqdn = fqdn or getfqdn()
         self.string_max_length = int(string_max_length)
         self.list_max_length = int(list_max_length)
 
+        if inner_frames_max_length is None and outer_frames_max_length is None:
+            self.frames_window = None
+        else:
+            inner = int(inner_frames_max_length or 0)
+            outer = int(outer_frames_max_length or 0)
+            if inner < 0 or outer < 0:
+                raise ValueError('frames max length must not be negative')
+            if inner + outer == 0:
+                raise ValueError('frames window must keep at least one frame')
+            self.frames_window = (inner, outer)
+
+        self.var_filter = VarFilter(names=exclude_var_names,
+                                    types=exclude_var_types,
+                                    modules=exclude_var_modules)
+
     def format(self, record):
         """Populates the message attribute of the record and returns a
         json representation of the record that is suitable for Sentry.
@@ -126,7 +165,13 @@ class Log2Json(logging.Formatter):
                                                "module": record.module
                                                }
 
-        stack = inspect.getinnerframes(tb)
+        outer_stack, inner_stack, omitted = self._get_stack(tb)
+
+        stack_info = get_stack_info(outer_stack, vars_filter=self.var_filter)
+        if omitted:
+            stack_info.append(_get_omitted_frame(omitted))
+            stack_info.extend(get_stack_info(inner_stack,
+                                             vars_filter=self.var_filter))
 
         # This next python statement copied pretty much verbatim from
         # raven-python (https://github.com/getsentry/raven-python).
@@ -140,10 +185,35 @@ class Log2Json(logging.Formatter):
                 v,
                 string_length=self.string_max_length,
                 list_length=self.list_max_length),
-            get_stack_info(iter_stack_frames(stack)))
+            stack_info)
         # end of copied code
 
         data['sentry.interfaces.Stacktrace'] = {
             'frames': frames }
 
         return data
+
+    def _get_stack(self, tb):
+        """Returns (frame, lineno) pairs of the traceback, outermost
+        first. Frames with __traceback_hide__ local variable are skipped.
+        If frames window is set, frames between outermost and innermost
+        ones are dropped without being inspected further. Dropped frames
+        are counted and the result is (outer, inner, omitted); without
+        window all frames are in outer."""
+        stack = []
+        while tb is not None:
+            frame = tb.tb_frame
+            f_locals = getattr(frame, 'f_locals', {})
+            if not _getitem_from_frame(f_locals, '__traceback_hide__'):
+                stack.append((frame, tb.tb_lineno))
+            tb = tb.tb_next
+
+        if self.frames_window is None:
+            return stack, [], 0
+
+        inner, outer = self.frames_window
+        omitted = len(stack) - inner - outer
+        if omitted <= 0:
+            return stack, [], 0
+
+        return stack[:outer], stack[len(stack) - inner:], omitted
@@ -0,0 +1,130 @@
+# -*- coding: utf8 -*-
+"""
+Provides functions to encode Sentry's JSON events into the compressed and
+base64 encoded payload accepted by Sentry's store API and to render
+authentication headers for them. PayloadFileHandler uses them to write log
+records directly in the format produced by log2sentry-prepare.
+"""
+
+import base64
+import logging
+import os.path
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from .log2json import Log2Json
+
+__all__ = ('encode_payload', 'decode_payload', 'render_headers',
+           'get_client_ident', 'PayloadFileHandler')
+
+
+HEADERS_PATTERN = '''User-Agent: {client}
+X-Sentry-Auth: Sentry sentry_timestamp={timestamp}, sentry_client={client}, sentry_version=2.0, sentry_key={public_key}, sentry_secret={secret_key}
+Content-Type: application/octet-stream'''
+
+
+def encode_payload(data):
+    """Compresses JSON string data and encodes it with base64."""
+    return base64.b64encode(zlib.compress(data))
+
+
+def decode_payload(payload):
+    """Returns JSON string data of payload created by encode_payload."""
+    return zlib.decompress(base64.b64decode(payload))
+
+
+def render_headers(public_key, secret_key, timestamp=None):
+    """Returns HTTP headers with Sentry's authentication, one per line."""
+    if timestamp is None:
+        timestamp = time.time()
+
+    return HEADERS_PATTERN.format(client=get_client_ident(),
+                                  timestamp=timestamp,
+                                  public_key=public_key,
+                                  secret_key=secret_key)
+
+
+def get_client_ident():
+    try:
+        from . import VERSION as version
+    except ImportError:
+        version = 'unknown'
+
+    return 'log2sentry/' + version
+
+
+class PayloadFileHandler(logging.Handler):
+    """Handler for python standard logging that writes each record into
+    separate file as payload ready to send to Sentry. To each data file
+    .header file with Sentry's authentication headers is created, so output
+    is the same as log2sentry-prepare produces and no further processing
+    is needed.
+
+    Usage:
+
+        handler = PayloadFileHandler('/var/spool/sentry',
+                                     PUBLIC_KEY, SECRET_KEY)
+        handler.setFormatter(Log2Json(project='default'))
+        logging.getLogger().addHandler(handler)
+    """
+
+    def __init__(self, directory, public_key, secret_key, prefix='log2sentry',
+                 formatter=None):
+        """
+        directory: target directory, it must exist
+        public_key, secret_key: Sentry's authentication keys
+        prefix: use prefix for generated files
+        formatter: formatter of records, Log2Json with default options is
+                   created on the first record if it is not set"""
+        logging.Handler.__init__(self)
+        self.directory = os.path.abspath(directory)
+        self.public_key = public_key
+        self.secret_key = secret_key
+        self.prefix = prefix
+        self.formatter = formatter
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    def format(self, record):
+        if self.formatter is None:
+            # created lazily - Log2Json resolves fqdn, which is useless if
+            # formatter is set later on
+            self.formatter = Log2Json()
+        return self.formatter.format(record)
+
+    def emit(self, record):
+        try:
+            payload = encode_payload(self.format(record))
+            headers = render_headers(self.public_key, self.secret_key)
+
+            base_path = self._get_base_path()
+
+            # header file is written first, so whoever waits for data file
+            # will always find complete pair
+            self._write(base_path + '.header', headers)
+            self._write(base_path + '.json', payload)
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _get_base_path(self):
+        with self._counter_lock:
+            self._counter += 1
+            counter = self._counter
+
+        ts = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        file_name = '{0}_{1}_{2}_{3}'.format(self.prefix, ts, os.getpid(),
+                                            counter)
+        return os.path.join(self.directory, file_name)
+
+    def _write(self, path, data):
+        # write to temporary file and rename it, so that readers never see
+        # partially written data
+        temp_path = os.path.join(os.path.dirname(path),
+                                 '.' + os.path.basename(path) + '.tmp')
+        with open(temp_path, 'w') as fd:
+            fd.write(data)
+        os.rename(temp_path, path)
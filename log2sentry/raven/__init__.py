@@ -173,11 +173,15 @@ def iter_stack_frames(frames=None):
         yield frame, lineno
 
 
-def get_stack_info(frames, list_max_length=None, string_max_length=None):
+def get_stack_info(frames, list_max_length=None, string_max_length=None,
+                   vars_filter=None):
     """
     Given a list of frames, returns a list of stack information
     dictionary objects that are JSON-ready.
 
+    If ``vars_filter`` is given, it is called with dictionary of frame
+    locals and its result is serialized instead.
+
     We have to be careful here as certain implementations of the
     _Frame class do not contain the nescesary data to lookup all
     of the information we want.
@@ -239,6 +243,9 @@ def get_stack_info(frames, list_max_length=None, string_max_length=None):
             except Exception:
                 f_locals = '<invalid local scope>'
 
+        if vars_filter is not None and isinstance(f_locals, dict):
+            f_locals = vars_filter(f_locals)
+
         frame_result = {
             'abs_path': abs_path,
             'filename': filename,
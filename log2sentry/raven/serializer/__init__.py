@@ -8,3 +8,5 @@ raven.utils.serializer
 
 from .base import *  # NOQA
 from .manager import *  # NOQA
+# iterative transform replaces the recursive one exported by manager
+from .iterative import *  # NOQA
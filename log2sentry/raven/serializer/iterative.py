@@ -0,0 +1,209 @@
+"""
+log2sentry.raven.serializer.iterative
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Iterative variant of ``manager.Serializer``. Nested values are walked with
+an explicit work stack instead of recursing through ``Serializer.recurse``,
+so the depth of serialized data is not bound by the interpreter's recursion
+limit. Output is identical to the recursive implementation.
+"""
+
+import math
+from contextlib import closing
+from itertools import islice
+
+from .base import (Serializer as BaseSerializer, IterableSerializer,
+                   DictSerializer, TypeSerializer, UUIDSerializer,
+                   UnicodeSerializer, StringSerializer, BooleanSerializer,
+                   FloatSerializer, IntegerSerializer, LongSerializer)
+from .manager import Serializer, manager, logger
+from ..encoding import to_string, to_unicode
+
+__all__ = ('IterativeSerializer', 'transform')
+
+
+_ITERABLE, _DICT, _SENTRY, _LEAF, _CUSTOM = range(5)
+
+# Leaf serializers of base module inlined as f(value, string_max_length).
+_LEAF_HANDLERS = {
+    UUIDSerializer: lambda value, length: repr(value),
+    UnicodeSerializer: lambda value, length: to_unicode(value)[:length],
+    StringSerializer: lambda value, length: to_string(value)[:length],
+    BooleanSerializer: lambda value, length: bool(value),
+    FloatSerializer: lambda value, length: float(value),
+    IntegerSerializer: lambda value, length: int(value),
+    LongSerializer: lambda value, length: long(value),
+}
+
+_PENDING = object()
+
+# indexes of work stack frame
+_KIND, _VALUE, _OBJID, _ITERATOR, _RESULT, _DEPTH, _KEY = range(7)
+
+
+class IterativeSerializer(Serializer):
+
+    def __init__(self, manager):
+        super(IterativeSerializer, self).__init__(manager)
+
+        # (types or None, serializer, kind, handler) - when types are known
+        # isinstance() is called directly instead of serializer.can()
+        self.dispatch = []
+        for serializer in self.serializers:
+            cls = type(serializer)
+            if cls is IterableSerializer:
+                kind, handler = _ITERABLE, None
+            elif cls is DictSerializer:
+                kind, handler = _DICT, None
+            elif cls is TypeSerializer:
+                kind, handler = _SENTRY, None
+            elif cls in _LEAF_HANDLERS:
+                kind, handler = _LEAF, _LEAF_HANDLERS[cls]
+            else:
+                kind, handler = _CUSTOM, serializer.serialize
+
+            if cls.can.__func__ is BaseSerializer.can.__func__:
+                types = serializer.types
+            else:
+                types = None
+
+            self.dispatch.append((types, serializer, kind, handler))
+
+    def close(self):
+        del self.dispatch
+        super(IterativeSerializer, self).close()
+
+    def transform(self, value, **kwargs):
+        """
+        Transforms ``value`` via registered serializers. Containers are
+        processed one element at a time using a work stack, limits are
+        computed once per call.
+        """
+        max_depth = kwargs.get('max_depth', 6)
+
+        list_max_length = kwargs.get('list_max_length') or None
+        if list_max_length is not None:
+            list_max_length = max(0, int(math.ceil(list_max_length)))
+
+        options = (list_max_length, kwargs.get('string_max_length', None),
+                   kwargs)
+
+        stack = []
+        result = self._enter(value, kwargs.get('_depth', 0), stack, options)
+
+        while stack:
+            frame = stack[-1]
+            kind = frame[_KIND]
+
+            try:
+                child = next(frame[_ITERATOR])
+                if kind == _DICT:
+                    key, child = child
+                    frame[_KEY] = to_string(key)
+            except StopIteration:
+                result = frame[_RESULT]
+                if kind == _ITERABLE:
+                    result = tuple(result)
+            except Exception as e:
+                logger.exception(e)
+                result = unicode(type(frame[_VALUE]))
+            else:
+                depth = frame[_DEPTH] + 1
+                if depth >= max_depth:
+                    try:
+                        child = repr(child)
+                    except Exception as e:
+                        logger.exception(e)
+                        self._append(frame, unicode(type(child)))
+                        continue
+
+                try:
+                    result = self._enter(child, depth, stack, options)
+                except Exception as e:
+                    # serializer.can() failed, the recursive implementation
+                    # fails the whole parent in such case
+                    logger.exception(e)
+                    result = unicode(type(frame[_VALUE]))
+                else:
+                    if result is not _PENDING:
+                        self._append(frame, result)
+                    continue
+
+            # frame is finished, hand its result over to the parent
+            stack.pop()
+            self.context.remove(frame[_OBJID])
+            if stack:
+                self._append(stack[-1], result)
+
+        return result
+
+    def _enter(self, value, depth, stack, options):
+        """
+        Serializes ``value`` at once or pushes new frame to ``stack`` and
+        returns ``_PENDING`` if value is a container.
+        """
+        if value is None:
+            return None
+
+        context = self.context
+        objid = id(value)
+        if objid in context:
+            return '<...>'
+        context.add(objid)
+
+        pending = False
+        try:
+            for types, serializer, kind, handler in self.dispatch:
+                if types is not None:
+                    if isinstance(value, types):
+                        break
+                elif serializer.can(value):
+                    break
+            else:
+                # if all else fails, lets use the repr of the object
+                try:
+                    return self._enter(repr(value), depth, stack, options)
+                except Exception as e:
+                    logger.exception(e)
+                    return unicode(type(value))
+
+            list_max_length, string_max_length, kwargs = options
+            try:
+                if kind == _LEAF:
+                    return handler(value, string_max_length)
+                elif kind == _CUSTOM:
+                    kwargs = dict(kwargs, _depth=depth)
+                    return handler(value, **kwargs)
+                elif kind == _ITERABLE:
+                    iterator = islice(value, list_max_length)
+                    result = []
+                elif kind == _DICT:
+                    iterator = islice(value.iteritems(), list_max_length)
+                    result = {}
+                else:
+                    iterator = iter((value.__sentry__(),))
+                    result = None
+            except Exception as e:
+                logger.exception(e)
+                return unicode(type(value))
+
+            stack.append([kind, value, objid, iterator, result, depth, None])
+            pending = True
+            return _PENDING
+        finally:
+            if not pending:
+                context.remove(objid)
+
+    def _append(self, frame, result):
+        kind = frame[_KIND]
+        if kind == _ITERABLE:
+            frame[_RESULT].append(result)
+        elif kind == _DICT:
+            frame[_RESULT][frame[_KEY]] = result
+        else:
+            frame[_RESULT] = result
+
+
+def transform(value, manager=manager, **kwargs):
+    with closing(IterativeSerializer(manager)) as serializer:
+        return serializer.transform(value, **kwargs)
@@ -0,0 +1,185 @@
+# -*- coding: utf8 -*-
+"""
+Provides VarFilter class which replaces selected local variables of stack
+frames by placeholder before they are serialized. Serialization calls repr()
+of unknown objects, that can be expensive or even cause I/O (e.g. ORM objects
+querying the database).
+"""
+
+import fnmatch
+import inspect
+import re
+import sys
+import weakref
+from types import ClassType, InstanceType
+
+__all__ = ('VarFilter',)
+
+
+HIDE_VARS_MARKER = '__traceback_hide_vars__'
+
+
+def _compile_globs(patterns):
+    if not patterns:
+        return None
+    if isinstance(patterns, basestring):
+        patterns = [patterns]
+    return re.compile('|'.join('(?:%s)' % fnmatch.translate(p)
+                               for p in patterns))
+
+
+class VarFilter(object):
+    """Matcher of local variables that will not be serialized. Variable is
+    excluded if its name matches any of name globs, its value is instance of
+    any of types or its class is defined in module matching any of module
+    globs. Types can be given as classes or as dotted names
+    ('module.Class'), so they don't have to be imported. Dotted name matches
+    class defined in that module, or class it refers to once the module is
+    imported, so re-exports like 'django.http.HttpRequest' work too.
+
+    Frame can opt out by local variable __traceback_hide_vars__ set to True
+    (all variables are excluded), to variable name or to sequence of
+    variable names. Any other true value excludes all variables.
+
+    Usage:
+
+        var_filter = VarFilter(names=['*password*', 'session'],
+                               types=['django.http.HttpRequest'],
+                               modules=['numpy', 'sqlalchemy.*'])
+        f_locals = var_filter(f_locals)
+    """
+
+    def __init__(self, names=None, types=None, modules=None):
+        """
+        names: globs of variable names,
+        types: classes or dotted names of classes,
+        modules: globs of module names"""
+        self.names_re = _compile_globs(names)
+        self.modules_re = _compile_globs(modules)
+
+        classes = []
+        class_names = set()
+        for type_ in types or ():
+            if isinstance(type_, basestring):
+                class_names.add(type_)
+            else:
+                classes.append(type_)
+        self.classes = tuple(classes)
+        self.class_names = frozenset(class_names)
+
+        # dotted names not yet resolved to classes via sys.modules
+        self._unresolved_names = set(class_names)
+
+        # class -> bool, result of type and module checks; weak keys don't
+        # keep dynamically created classes alive
+        self._class_cache = weakref.WeakKeyDictionary()
+
+    def __call__(self, f_locals):
+        """Returns f_locals with excluded values replaced by placeholder.
+        If nothing is excluded, f_locals is returned as is."""
+        if self._unresolved_names:
+            self._resolve_class_names()
+
+        hidden = _get_hidden_names(f_locals.get(HIDE_VARS_MARKER))
+        if hidden is True:
+            return dict((name, self._placeholder(value))
+                        for name, value in f_locals.iteritems())
+
+        if not (hidden or self.names_re or self.classes or self.class_names
+                or self.modules_re):
+            return f_locals
+
+        result = {}
+        for name, value in f_locals.iteritems():
+            if (hidden and name in hidden) or self._is_excluded(name, value):
+                value = self._placeholder(value)
+            result[name] = value
+        return result
+
+    def _resolve_class_names(self):
+        resolved = []
+        for class_name in list(self._unresolved_names):
+            module_name, _, attr = class_name.rpartition('.')
+            module = sys.modules.get(module_name)
+            if module is None:
+                continue
+            cls = getattr(module, attr, None)
+            if isinstance(cls, (type, ClassType)):
+                resolved.append(cls)
+            self._unresolved_names.discard(class_name)
+
+        if resolved:
+            self.classes += tuple(resolved)
+            # cached results don't know about new classes
+            self._class_cache.clear()
+
+    def _is_excluded(self, name, value):
+        if self.names_re and isinstance(name, basestring) and \
+                self.names_re.match(name):
+            return True
+
+        cls = _get_class(value)
+        try:
+            return self._class_cache[cls]
+        except KeyError:
+            pass
+        except TypeError:
+            # class can't be weakly referenced or hashed
+            return self._is_class_excluded(cls)
+
+        excluded = self._is_class_excluded(cls)
+        try:
+            self._class_cache[cls] = excluded
+        except TypeError:
+            pass
+        return excluded
+
+    def _is_class_excluded(self, cls):
+        if self.classes and issubclass(cls, self.classes):
+            return True
+
+        if self.class_names:
+            for base in inspect.getmro(cls):
+                if _get_class_name(base) in self.class_names:
+                    return True
+
+        if self.modules_re:
+            module = getattr(cls, '__module__', None)
+            if isinstance(module, basestring) and self.modules_re.match(module):
+                return True
+
+        return False
+
+    def _placeholder(self, value):
+        return '<excluded {0}>'.format(_get_class_name(_get_class(value)))
+
+
+def _get_hidden_names(marker):
+    """Returns True if all variables of frame are hidden, otherwise set of
+    hidden names (possibly empty)."""
+    if marker is None or marker is False:
+        return frozenset()
+    if marker is True:
+        return True
+    if isinstance(marker, basestring):
+        return frozenset([marker]) if marker else frozenset()
+    try:
+        if not marker:
+            return frozenset()
+        return frozenset(marker)
+    except Exception:
+        # not iterable (or contains unhashable items) - be safe, hide all
+        return True
+
+
+def _get_class(value):
+    cls = type(value)
+    if cls is InstanceType:
+        # old-style class
+        cls = value.__class__
+    return cls
+
+
+def _get_class_name(cls):
+    return '{0}.{1}'.format(getattr(cls, '__module__', None),
+                            getattr(cls, '__name__', '?'))
@@ -8,7 +8,8 @@ setup(
     packages=['log2sentry',
               'log2sentry.raven',
               'log2sentry.raven.serializer'],
-    scripts=['scripts/log2sentry-prepare'],
+    scripts=['scripts/log2sentry-prepare',
+             'scripts/log2sentry-query'],
     version='0.6',
     author='Jakub Matys',
     author_email='matys.jakub@gmail.com',